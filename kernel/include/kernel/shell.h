@@ -1,6 +1,8 @@
 #ifndef KERNEL_SHELL_H
 #define KERNEL_SHELL_H
 
+#include <stddef.h>
+
 /**
  * Initialize and run the interactive shell
  *
@@ -38,6 +40,16 @@ int shell_execute(char **args);
  */
 char** parse_line(char *line);
 
+/**
+ * Parse a command line into a caller-provided array
+ *
+ * @param line   Input line to parse (will be modified)
+ * @param tokens Array receiving the tokens, always NULL-terminated
+ * @param cap    Number of entries in tokens, including the terminating NULL, nothing is stored when it is 0
+ * @return Number of tokens stored
+ */
+size_t parse_line_into(char *line, char **tokens, size_t cap);
+
 /**
  * Built-in command: clear screen
  *
@@ -135,6 +135,35 @@ char* input_line(void) {
 
 }
 
+/**
+ * Parse command line into a caller-provided array
+ *
+ * Same tokenization as parse_line(), without allocating. Tokens that do not fit are dropped, so the array is always
+ * NULL-terminated.
+ *
+ * @param line   Input string to parse (will be modified by strtok)
+ * @param tokens Array receiving the string pointers
+ * @param cap    Number of entries in tokens, including the terminating NULL. With 0 nothing is stored, not even NULL
+ * @return Number of tokens stored
+ */
+size_t parse_line_into(char *line, char **tokens, size_t cap) {
+    // There is no room for the terminating NULL, and cap - 1 would wrap around
+    if (cap == 0) {
+        return 0;
+    }
+
+    size_t position = 0;
+    char *token = strtok(line, SHELL_TOK_DELIM);
+
+    while (token != NULL && position < cap - 1) {
+        tokens[position++] = token;
+        // Subsequent calls: pass NULL to continue tokenizing same string
+        token = strtok(NULL, SHELL_TOK_DELIM);
+    }
+    tokens[position] = NULL;
+    return position;
+}
+
 /**
  * Parse command line into arguments
  *
@@ -148,21 +177,13 @@ char* input_line(void) {
  * @return Null-terminated array of string pointers. Caller must free with kfree().
  */
 char** parse_line(char *line) {
-    int bufsize = SHELL_TOK_BUFSIZE, position = 0;
-    char** tokens = (char**) kmalloc(bufsize * sizeof(char*)), *token;
+    char** tokens = (char**) kmalloc(SHELL_TOK_BUFSIZE * sizeof(char*));
 
     if (!tokens) {
         printf("[FAILED] parse_line: tokens allocation error\n");
         return NULL;
     }
-    token = strtok(line, SHELL_TOK_DELIM);
-    while (token != NULL) {
-        tokens[position++] = token;
-        // TODO: Handle case where position >= bufsize (too many arguments)
-        // Subsequent calls: pass NULL to continue tokenizing same string
-        token = strtok(NULL, SHELL_TOK_DELIM);
-    }
-    tokens[position] = NULL;
+    parse_line_into(line, tokens, SHELL_TOK_BUFSIZE);
     return tokens;
 }
 
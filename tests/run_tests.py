@@ -1,24 +1,35 @@
 import argparse
+import importlib
 import os
 import sys
 from collections import defaultdict
 
-# Add parent directory to path
-sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
-
-from test_framework import OlymposTestFramework
-from test_printf import register_printf_tests
-from test_serial import register_serial_tests
-from test_assert import register_assert_tests
-from test_gdt import register_gdt_tests
-from test_interrupt import register_interrupt_tests
-from test_pic import register_pic_tests
-from test_irq import register_irq_tests
-from test_paging import register_paging_tests
-from test_kheap import register_kheap_tests
-from test_shell import register_shell_tests
-from test_tss import register_tss_tests
-from test_syscall import register_syscall_tests
+from test_framework import QEMU_TIMEOUT, OlymposTestFramework
+
+# Test modules in registration order, with the test name prefixes each of them registers
+REGISTRARS = {
+    "test_serial": ("serial",),
+    "test_printf": ("printf",),
+    "test_assert": ("assert",),
+    "test_gdt": ("gdt",),
+    "test_interrupt": ("interrupt",),
+    "test_pic": ("pic",),
+    "test_irq": ("irq",),
+    "test_paging": ("paging",),
+    "test_kheap": ("kheap",),
+    "test_shell": ("shell",),
+    "test_tss": ("tss", "gdt"),
+    "test_syscall": ("syscall",),
+    "test_terminal": ("terminal",),
+}
+
+
+def register_tests(framework, prefixes=None):
+    # Only import the modules that register tests under the requested prefixes, all of them by default
+    for module_name, module_prefixes in REGISTRARS.items():
+        if prefixes is None or prefixes.intersection(module_prefixes):
+            module = importlib.import_module(module_name)
+            getattr(module, f"register_{module_name[5:]}_tests")(framework)
 
 
 def list_tests(framework):
@@ -35,7 +46,13 @@ def list_tests(framework):
 
 
 def filter_tests(framework, test_patterns):
+    tests_by_name = {test["name"]: test for test in framework.tests}
+    tests_by_file = defaultdict(list)
+    for test in framework.tests:
+        tests_by_file[test["name"].split("_", 1)[0]].append(test)
+
     filtered = []
+    selected = set()
 
     for pattern in test_patterns:
         if not pattern.startswith("test_"):
@@ -45,10 +62,15 @@ def filter_tests(framework, test_patterns):
         name = pattern[5:]
         # File-level pattern (e.g., test_printf)
         if "_" not in name:
-            filtered.extend(t for t in framework.tests if t["name"].startswith(f"{name}_"))
+            matches = tests_by_file.get(name, [])
         # Specific test pattern
         else:
-            filtered.extend(t for t in framework.tests if t["name"] == name)
+            matches = [tests_by_name[name]] if name in tests_by_name else []
+        # A test matched by several patterns runs once
+        for test in matches:
+            if test["name"] not in selected:
+                selected.add(test["name"])
+                filtered.append(test)
 
     return filtered
 
@@ -58,24 +80,30 @@ def main():
     parser.add_argument("tests", nargs="*", help="Tests to run")
     parser.add_argument("--list", action="store_true", help="List all available tests")
     parser.add_argument("--verbose", "-v", action="store_true", help="Show build output")
+    parser.add_argument(
+        "--jobs", "-j", type=int, default=os.cpu_count() or 1, help="Number of tests to run in parallel"
+    )
+    parser.add_argument("--iso", action="store_true", help="Boot every test kernel from a GRUB ISO")
+    parser.add_argument("--no-batch", action="store_true", help="Boot every test in its own kernel")
+    parser.add_argument("--no-cache", action="store_true", help="Boot tests even if their kernel passed before")
+    parser.add_argument(
+        "--qemu-timeout", type=float, default=QEMU_TIMEOUT, help="Seconds a test kernel may run before it is killed"
+    )
     args = parser.parse_args()
 
     framework = OlymposTestFramework()
     framework.set_verbose(args.verbose)
-
-    # Register all tests
-    register_serial_tests(framework)
-    register_printf_tests(framework)
-    register_assert_tests(framework)
-    register_gdt_tests(framework)
-    register_interrupt_tests(framework)
-    register_pic_tests(framework)
-    register_irq_tests(framework)
-    register_paging_tests(framework)
-    register_kheap_tests(framework)
-    register_shell_tests(framework)
-    register_tss_tests(framework)
-    register_syscall_tests(framework)
+    framework.set_jobs(args.jobs)
+    framework.set_use_iso(args.iso)
+    framework.set_batch(not args.no_batch)
+    framework.set_use_cache(not args.no_cache)
+    framework.set_qemu_timeout(args.qemu_timeout)
+
+    if args.list or not args.tests:
+        register_tests(framework)
+    else:
+        prefixes = {pattern[5:].split("_", 1)[0] for pattern in args.tests if pattern.startswith("test_")}
+        register_tests(framework, prefixes)
 
     if args.list:
         list_tests(framework)
@@ -91,7 +119,6 @@ def main():
         sys.exit(1)
 
     success = framework.run_all_tests()
-    framework.cleanup()
     sys.exit(0 if success else 1)
 
 
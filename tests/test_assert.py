@@ -1,5 +1,4 @@
-import os
-import shutil
+from test_framework import TEST_PASS, split_template
 
 ASSERT_FILE_PATH = "libc/assert/assert.c"
 MODIFIED_ASSERT_C = """
@@ -31,81 +30,43 @@ ASSERT_TEST_TEMPLATE = """
 
 #include <kernel/serial.h>
 
-// Exit QEMU function for successful test completion
-void exit_qemu(uint32_t exit_code) {{
-    asm volatile("outl %0, %1" : : "a"(exit_code), "Nd"((uint16_t)0xf4));
-}}
+#include "olympos_test_harness.h"
 
-void kernel_main(unsigned long magic, unsigned long addr) {{
+void test_setup(unsigned long magic, unsigned long addr) {
     // Initialize serial for testing
     serial_setup(SERIAL_COM1_BASE, SERIAL_BAUD_115200);
-    
+}
+
+void run_test_body(void) {
     // Test code
     {test_body}
-    
-    // Exit QEMU with success
-    exit_qemu(0);
-    
-    // Halt if exit failed
-    while(1) {{
-        asm volatile("hlt");
-    }}
-}}
+}
 """
 
 
-def backup_assert_file(framework):
-    assert_path = framework.get_path(ASSERT_FILE_PATH)
-    backup_path = f"{assert_path}.bak"
-    if os.path.exists(backup_path):
-        os.remove(backup_path)
-    shutil.copy2(assert_path, backup_path)
-    return backup_path
-
-
-def modify_assert_file(framework):
-    assert_path = framework.get_path(ASSERT_FILE_PATH)
-    with open(assert_path, "w") as f:
-        f.write(MODIFIED_ASSERT_C)
-
-
-def restore_assert_file(framework, backup_path):
-    assert_path = framework.get_path(ASSERT_FILE_PATH)
-    if os.path.exists(backup_path):
-        shutil.copy2(backup_path, assert_path)
-        os.remove(backup_path)
-
-
 def register_assert_tests(framework):
-    original_run_all_tests = framework.run_all_tests
-    def patched_run_all_tests():
-        backup_path = backup_assert_file(framework)
-        modify_assert_file(framework)
-        try:
-            return original_run_all_tests()
-        finally:
-            restore_assert_file(framework, backup_path)
-    framework.run_all_tests = patched_run_all_tests
+    # Build every test kernel against an __assert_fail that exits QEMU instead of halting
+    framework.override_source(ASSERT_FILE_PATH, MODIFIED_ASSERT_C)
 
     # Test 1: Successful assertion
     test_body = """
-    serial_write_string(SERIAL_COM1_BASE, "TEST_RUNNING\\n");
+    serial_write_string(SERIAL_COM1_BASE, TEST_RUNNING_MSG);
     
     int w = 5, y = 33;
     serial_write_string(SERIAL_COM1_BASE, "Asserting that sum > 30... ");
     assert((w + y) > 30 && "Sum is not greater than 30");
     serial_write_string(SERIAL_COM1_BASE, "Passed!\\n");
     
-    serial_write_string(SERIAL_COM1_BASE, "TEST_PASS\\n");
+    serial_write_string(SERIAL_COM1_BASE, TEST_PASS_MSG);
     """
 
-    framework.register_test(
-        name="assert_success", test_code=ASSERT_TEST_TEMPLATE.format(test_body=test_body), expected_output="TEST_PASS"
+    framework.register_batchable_test(
+        name="assert_success", template=ASSERT_TEST_TEMPLATE, test_body=test_body, expected_output=TEST_PASS
     )
 
     # Test 2: Multiple successful assertions
     test_body = """
-    serial_write_string(SERIAL_COM1_BASE, "TEST_RUNNING\\n");
+    serial_write_string(SERIAL_COM1_BASE, TEST_RUNNING_MSG);
     
     int w = 5, y = 33;
     serial_write_string(SERIAL_COM1_BASE, "Asserting that sum > 30... ");
@@ -116,18 +77,19 @@ def register_assert_tests(framework):
     assert((w + y) > 37 && "Sum is not greater than 37");
     serial_write_string(SERIAL_COM1_BASE, "Passed!\\n");
     
-    serial_write_string(SERIAL_COM1_BASE, "TEST_PASS\\n");
+    serial_write_string(SERIAL_COM1_BASE, TEST_PASS_MSG);
     """
 
-    framework.register_test(
+    framework.register_batchable_test(
         name="assert_multiple_success",
-        test_code=ASSERT_TEST_TEMPLATE.format(test_body=test_body),
-        expected_output="TEST_PASS",
+        template=ASSERT_TEST_TEMPLATE,
+        test_body=test_body,
+        expected_output=TEST_PASS,
     )
 
     # Test 3: Assert with edge values
     test_body = """
-    serial_write_string(SERIAL_COM1_BASE, "TEST_RUNNING\\n");
+    serial_write_string(SERIAL_COM1_BASE, TEST_RUNNING_MSG);
     
     // Edge case: exactly equal
     int a = 38, b = 0;
@@ -142,31 +104,30 @@ def register_assert_tests(framework):
     assert(a > 0 && "INT_MAX should be positive");
     serial_write_string(SERIAL_COM1_BASE, "Passed!\\n");
     
-    serial_write_string(SERIAL_COM1_BASE, "TEST_PASS\\n");
+    serial_write_string(SERIAL_COM1_BASE, TEST_PASS_MSG);
     """
 
-    framework.register_test(
-        name="assert_edge_values",
-        test_code=ASSERT_TEST_TEMPLATE.format(test_body=test_body),
-        expected_output="TEST_PASS",
+    framework.register_batchable_test(
+        name="assert_edge_values", template=ASSERT_TEST_TEMPLATE, test_body=test_body, expected_output=TEST_PASS
     )
 
     # Test 4: Assert with complex expressions
     test_body = """
-    serial_write_string(SERIAL_COM1_BASE, "TEST_RUNNING\\n");
+    serial_write_string(SERIAL_COM1_BASE, TEST_RUNNING_MSG);
     
     int a = 10, b = 20, c = 30;
     serial_write_string(SERIAL_COM1_BASE, "Testing complex assertion... ");
     assert(((a * b) > (c * 5)) && (a != 0) && (b != 0) && "Complex expression failed");
     serial_write_string(SERIAL_COM1_BASE, "Passed!\\n");
     
-    serial_write_string(SERIAL_COM1_BASE, "TEST_PASS\\n");
+    serial_write_string(SERIAL_COM1_BASE, TEST_PASS_MSG);
     """
 
-    framework.register_test(
+    framework.register_batchable_test(
         name="assert_complex_expression",
-        test_code=ASSERT_TEST_TEMPLATE.format(test_body=test_body),
-        expected_output="TEST_PASS",
+        template=ASSERT_TEST_TEMPLATE,
+        test_body=test_body,
+        expected_output=TEST_PASS,
     )
 
     # Test 5: Assert failure
@@ -175,8 +136,11 @@ def register_assert_tests(framework):
     assert((w + y) > 50 && "Sum is not greater than 50");
     """
 
-    framework.register_test(
-        name="assert_failure",
-        test_code=ASSERT_TEST_TEMPLATE.format(test_body=test_body),
-        expected_output="""kernel: init/kernel.c:20: kernel_main: Assertion `(w + y) > 50 && "Sum is not greater than 50"' failed.""",
+    # __assert_fail reports the line of kernel.c the template puts the assertion on
+    prefix, _ = split_template(ASSERT_TEST_TEMPLATE)
+    line = prefix.count("\n") + test_body.count("\n", 0, test_body.index("assert(")) + 1
+    expected_output = (
+        f"kernel: init/kernel.c:{line}: run_test_body: "
+        """Assertion `(w + y) > 50 && "Sum is not greater than 50"' failed."""
     )
+    framework.register_tests([("assert_failure", ASSERT_TEST_TEMPLATE, test_body, expected_output)])
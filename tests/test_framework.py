@@ -1,8 +1,207 @@
+import fnmatch
+import functools
+import hashlib
 import os
+import selectors
+import shlex
 import shutil
 import subprocess
-from collections import Counter
-from typing import Any, Dict
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from typing import Any, Callable, Dict, Iterable, NamedTuple, Optional
+
+# Build outputs that must not be copied from the source tree into a worker sandbox
+BUILD_OUTPUTS = (".git", "sysroot", "isodir*", "*.iso", "*.o", "*.d", "*.a", "*.kernel")
+# Directory, relative to the source tree, holding previously built test kernels
+KERNEL_CACHE_DIR = ".olympos-test-cache"
+SANDBOX_IGNORE = shutil.ignore_patterns(*BUILD_OUTPUTS, KERNEL_CACHE_DIR)
+
+# Flags added to CFLAGS and CPPFLAGS of the test kernel builds
+TEST_FLAGS = "-DTEST"
+# Added in verbose runs, tests keep informational output that a passing run does not need behind VERBOSE_TESTS
+VERBOSE_FLAGS = "-DVERBOSE_TESTS"
+# Optimization flags of the test kernel builds, replacing the default "-O2 -g". Test failures are diagnosed from
+# serial output, so no debug info is emitted; debug_initialize() only needs the symbol table, which is kept.
+TEST_CFLAGS = "-Os -fno-asynchronous-unwind-tables"
+
+# Boilerplate shared by the test kernels, written next to kernel.c in every sandbox. Tests including it only
+# define test_setup() and run_test_body().
+HARNESS_HEADER_PATH = "kernel/init/olympos_test_harness.h"
+HARNESS_HEADER = """#ifndef OLYMPOS_TEST_HARNESS_H
+#define OLYMPOS_TEST_HARNESS_H
+
+#include <stdint.h>
+
+// Exit QEMU function
+static inline void exit_qemu(uint32_t exit_code) {
+    asm volatile("outl %0, %1" : : "a"(exit_code), "Nd"((uint16_t)0xf4));
+}
+
+// Progress and result lines the framework looks for on the serial port
+#define TEST_RUNNING_MSG "TEST_RUNNING\\n"
+#define TEST_PASS_MSG "TEST_PASS\\n"
+#define TEST_FAIL_MSG "TEST_FAIL\\n"
+
+void test_setup(unsigned long magic, unsigned long addr);
+void run_test_body(void);
+
+void kernel_main(unsigned long magic, unsigned long addr) {
+    test_setup(magic, addr);
+    run_test_body();
+
+    // Exit QEMU with success
+    exit_qemu(0);
+
+    // Halt if exit failed, with interrupts disabled so that the hlt never returns
+    asm volatile("cli; hlt");
+    __builtin_unreachable();
+}
+
+#endif
+"""
+
+# RAM-backed directory the worker sandboxes are created in when it has room for them
+TMPFS_DIR = "/dev/shm"
+# Space set aside per sandbox: a copy of the sources plus objects, sysroot and a GRUB ISO
+SANDBOX_SIZE = 64 * 1024 * 1024
+
+# QEMU exit codes written through isa-debug-exit by exit_qemu(0) and exit_qemu(1)
+QEMU_EXIT_SUCCESS = 1
+QEMU_EXIT_FAILURE = 3
+# Serial output of a passing test, the usual expected output
+TEST_PASS = "TEST_PASS"
+# Serial output that tells a test kernel has failed before it reaches exit_qemu()
+FAILURE_MARKERS = (b"TEST_FAIL", b"Assertion")
+# Default number of seconds a test kernel may run before QEMU is killed
+QEMU_TIMEOUT = 30
+# Return code reported by run_qemu when the timeout killed QEMU
+QEMU_TIMED_OUT = -1
+# Bytes of serial output read at once, and kept per test
+READ_SIZE = 64 * 1024
+OUTPUT_SIZE = 256 * 1024
+# Serial markers framing every test of a batch kernel, see register_batchable_test
+BATCH_BEGIN = "<<<BEGIN {}>>>"
+BATCH_END = "<<<END {}>>>"
+BATCH_DONE = "<<<BATCH_DONE>>>"
+# Part of every pass stamp key, bump it when a change to how run_qemu judges output must invalidate recorded passes
+HARNESS_VERSION = 1
+
+
+class SandboxPaths(NamedTuple):
+    kernel_source: str
+    sysroot_kernel: str
+    grub_dir: str
+    iso_kernel: str
+    grub_cfg: str
+    iso: str
+
+
+@functools.lru_cache(maxsize=None)
+def sandbox_paths(work_dir: str) -> SandboxPaths:
+    # Resolved once per sandbox, every test run in it reuses the same paths
+    grub_dir = os.path.join(work_dir, "isodir-test", "boot", "grub")
+    return SandboxPaths(
+        kernel_source=os.path.join(work_dir, "kernel", "init", "kernel.c"),
+        sysroot_kernel=os.path.join(work_dir, "sysroot", "boot", "olympos.kernel"),
+        grub_dir=grub_dir,
+        iso_kernel=os.path.join(work_dir, "isodir-test", "boot", "olympos.kernel"),
+        grub_cfg=os.path.join(grub_dir, "grub.cfg"),
+        iso=os.path.join(work_dir, "olympos-test.iso"),
+    )
+
+
+@functools.lru_cache(maxsize=None)
+def kernel_cache_key(build_digest: str, test_code: str) -> str:
+    # A test source is looked up in the kernel cache several times per run, it is only hashed once
+    digest = hashlib.blake2b(build_digest.encode(), digest_size=16)
+    digest.update(test_code.encode())
+    return digest.hexdigest()
+
+
+@functools.lru_cache(maxsize=None)
+def qemu_accel_args() -> tuple[str, ...]:
+    # Hardware virtualization when the host offers it, probed once per process
+    if os.access("/dev/kvm", os.R_OK | os.W_OK):
+        return ("-accel", "kvm", "-cpu", "host")
+    # Several QEMU instances share the host, keep each one on a single TCG thread
+    return ("-accel", "tcg,thread=single")
+
+
+def qemu_command(boot_args: list[str]) -> list[str]:
+    # Every test kernel is booted with the same command line, only how the kernel is handed over differs
+    return [
+        "qemu-system-i386",
+        *boot_args,
+        "-serial",
+        "stdio",
+        "-display",
+        "none",
+        "-device",
+        "isa-debug-exit,iobase=0xf4,iosize=0x04",
+        "-no-reboot",
+        # Only the devices the tests use: no network card whose iPXE option ROM the BIOS would run on every
+        # boot, no floppy to probe and no monitor. The VGA card stays for the terminal tests.
+        "-nodefaults",
+        "-vga",
+        "std",
+        *qemu_accel_args(),
+    ]
+
+
+@functools.lru_cache(maxsize=None)
+def qemu_version() -> str:
+    # Asked once per process, recorded passes are tied to the QEMU that booted them
+    try:
+        return subprocess.run(["qemu-system-i386", "--version"], capture_output=True, text=True).stdout
+    except OSError:
+        return ""
+
+
+@functools.lru_cache(maxsize=None)
+def split_template(template: str) -> tuple[str, str]:
+    # A template is only searched for its {test_body} placeholder once
+    prefix, suffix = template.split("{test_body}")
+    return prefix, suffix
+
+
+@functools.lru_cache(maxsize=None)
+def render_template(template: str, test_body: str) -> str:
+    # Memoized, rendering the same test source again returns the already assembled string
+    prefix, suffix = split_template(template)
+    return "".join((prefix, test_body, suffix))
+
+
+# Framework instance and sandbox directory of the current worker process, set up by _init_worker
+_worker_framework = None
+_worker_dir = None
+
+
+def _init_worker(root_dir: str, sandbox_root: str, options: Dict[str, Any]):
+    global _worker_framework, _worker_dir
+    _worker_dir = os.path.join(sandbox_root, f"olympos-{os.getpid()}")
+    shutil.copytree(root_dir, _worker_dir, symlinks=True, ignore=SANDBOX_IGNORE)
+    for path, content in options["source_overrides"].items():
+        with open(os.path.join(_worker_dir, path), "w") as f:
+            f.write(content)
+    _worker_framework = OlymposTestFramework()
+    _worker_framework.set_verbose(options["verbose"])
+    _worker_framework.set_use_iso(options["use_iso"])
+    _worker_framework.set_qemu_timeout(options["qemu_timeout"])
+    _worker_framework.cache_dir = options["cache_dir"]
+    _worker_framework.build_digest = options["build_digest"]
+    _worker_framework.make_jobs = options["make_jobs"]
+    _worker_framework.set_build_env(_worker_dir)
+
+
+def _build_in_worker(test_code: str) -> bool:
+    return _worker_framework.create_test_kernel(test_code, _worker_dir)
+
+
+def _run_unit_in_worker(unit: Dict[str, Any]) -> list[Dict[str, Any]]:
+    if "tests" in unit:
+        return _worker_framework.run_batch(unit, _worker_dir)
+    return [_worker_framework.run_test(unit, _worker_dir)]
 
 
 class OlymposTestFramework:
@@ -10,81 +209,266 @@ class OlymposTestFramework:
         self.tests = []
         self.results = []
         self.verbose = False
+        self.use_iso = False
+        self.batch = True
+        self.use_cache = True
+        self.qemu_timeout = QEMU_TIMEOUT
+        self.jobs = os.cpu_count() or 1
+        # Parallel jobs of every make run, the cores left over when there are fewer workers than jobs
+        self.make_jobs = 1
+        # Source files written into every worker sandbox, the working tree itself is left untouched
+        self.source_overrides = {HARNESS_HEADER_PATH: HARNESS_HEADER}
         # Determine if we're in the test directory or root
-        self.in_test_dir = os.path.basename(os.getcwd()) == "test"
-        self.root_dir = ".." if self.in_test_dir else "."
+        self.root_dir = ".." if os.path.basename(os.getcwd()) == "test" else "."
+        self.cache_dir = os.path.join(self.root_dir, KERNEL_CACHE_DIR)
+        # Hash of everything besides the test code that ends up in a test kernel, see compute_build_digest
+        self.build_digest = ""
+        # Environment of the build scripts, sourced once per tree instead of once per build
+        self.build_env = None
+        self._root_env = None
+        self._sandbox_built = False
 
     def set_verbose(self, verbose):
         self.verbose = verbose
 
-    def get_path(self, path):
-        if self.in_test_dir:
-            return os.path.join(self.root_dir, path)
-        return path
+    def set_jobs(self, jobs):
+        self.jobs = max(1, jobs)
 
-    def register_test(self, name: str, test_code: str, expected_output: str):
-        self.tests.append({"name": name, "code": test_code, "expected": expected_output})
+    def set_use_iso(self, use_iso):
+        self.use_iso = use_iso
 
-    def backup_kernel(self):
-        kernel_path = self.get_path("kernel/init/kernel.c")
-        backup_path = f"{kernel_path}.bak"
-        if os.path.exists(backup_path):
-            os.remove(backup_path)
-        shutil.copy2(kernel_path, backup_path)
+    def set_batch(self, batch):
+        self.batch = batch
 
-    def restore_kernel(self):
-        kernel_path = self.get_path("kernel/init/kernel.c")
-        backup_path = f"{kernel_path}.bak"
-        if os.path.exists(backup_path):
-            shutil.move(backup_path, kernel_path)
+    def set_use_cache(self, use_cache):
+        self.use_cache = use_cache
 
-    def create_test_kernel(self, test_code: str) -> bool:
+    def set_qemu_timeout(self, qemu_timeout):
+        self.qemu_timeout = qemu_timeout
+
+    def override_source(self, path: str, content: str):
+        self.source_overrides[path] = content
+
+    def register_test(
+        self,
+        name: str,
+        test_code: Optional[str] = None,
+        expected_output: str = TEST_PASS,
+        needs_grub: bool = False,
+        test_code_fn: Optional[Callable[[], str]] = None,
+    ):
+        # Tests are booted with "qemu -kernel" unless they rely on multiboot info that only GRUB provides
+        test = {"name": name, "code": test_code, "expected": expected_output, "needs_grub": needs_grub}
+        # test_code_fn defers assembling the source until the test is selected to run, see render_tests
+        if test_code is None:
+            test["code_fn"] = test_code_fn
+        self.tests.append(test)
+
+    def register_tests(self, specs: Iterable[tuple[str, str, str, str]], needs_grub: bool = False):
+        # Bulk form of register_test for (name, template, test_body, expected_output) specs, the source of each test
+        # is only assembled once it is selected to run
+        self.tests.extend(
+            {
+                "name": name,
+                "code": None,
+                "expected": expected_output,
+                "needs_grub": needs_grub,
+                "code_fn": functools.partial(render_template, template, test_body),
+            }
+            for name, template, test_body, expected_output in specs
+        )
+
+    def render_tests(self):
+        for test in self.tests:
+            if "code_fn" in test:
+                test["code"] = test.pop("code_fn")()
+
+    def register_batchable_test(
+        self, name: str, template: str, test_body: str, expected_output: str, needs_grub: bool = False
+    ):
+        # Tests sharing a template may be booted together in a single kernel. The template must set up COM1,
+        # the test body must not stop the kernel unless it fails.
+        test_code_fn = functools.partial(render_template, template, test_body)
+        self.register_test(name, None, expected_output, needs_grub, test_code_fn)
+        self.tests[-1]["batch"] = (template, test_body)
+
+    def load_build_env(self, work_dir: str) -> Dict[str, str]:
+        # Everything the build scripts need from config.sh, PROJECTS lists are plain shell variables
+        result = subprocess.run(
+            ["sh", "-c", ". ./config.sh && export PROJECTS SYSTEM_HEADER_PROJECTS && env -0"],
+            cwd=work_dir,
+            capture_output=True,
+        )
+        return dict(entry.split("=", 1) for entry in result.stdout.decode().split("\0") if "=" in entry)
+
+    def set_build_env(self, work_dir: str):
+        env = self.load_build_env(work_dir)
+        env["CFLAGS"] = f"{TEST_CFLAGS} {self.test_flags()}"
+        env["CPPFLAGS"] = f"{env.get('CPPFLAGS', '')} {self.test_flags()}"
+        env["DESTDIR"] = env.get("SYSROOT", "")
+        if self.make_jobs > 1:
+            env["MAKEFLAGS"] = f"{env.get('MAKEFLAGS', '')} -j{self.make_jobs}".strip()
+        # Share compiled objects between sandboxes and runs when ccache is available
+        if shutil.which("ccache"):
+            env["CC"] = f"ccache {env.get('CC', '')}"
+            env["CCACHE_BASEDIR"] = os.path.abspath(work_dir)
+            env["CCACHE_NOHASHDIR"] = "1"
+        self.build_env = env
+
+    def test_flags(self) -> str:
+        return f"{TEST_FLAGS} {VERBOSE_FLAGS}" if self.verbose else TEST_FLAGS
+
+    def root_env(self) -> Dict[str, str]:
+        if self._root_env is None:
+            self._root_env = self.load_build_env(self.root_dir)
+        return self._root_env
+
+    def build_projects(self, work_dir: str) -> bool:
+        env = self.build_env
+        make = shlex.split(env.get("MAKE", "make"))
+        # Only kernel.c changes between tests. Once a sandbox is built, libc, the installed headers and every
+        # other kernel object are up to date and a test only needs kernel.c recompiled and the kernel relinked.
+        if self._sandbox_built:
+            steps = [("kernel", "install-kernel")]
+        else:
+            steps = [(project, "install-headers") for project in env["SYSTEM_HEADER_PROJECTS"].split()]
+            steps += [(project, "install") for project in env["PROJECTS"].split()]
+        os.makedirs(env["SYSROOT"], exist_ok=True)
+        for project, target in steps:
+            result = subprocess.run(
+                [*make, target], cwd=os.path.join(work_dir, project), env=env, **self._output_redirect()
+            )
+            if result.returncode != 0:
+                return False
+        self._sandbox_built = True
+        return True
+
+    def compute_build_digest(self) -> str:
+        digest = hashlib.blake2b(digest_size=16)
+        digest.update(f"{TEST_CFLAGS} {self.test_flags()}".encode())
         try:
-            kernel_path = self.get_path("kernel/init/kernel.c")
-            with open(kernel_path, "w") as f:
-                f.write(test_code)
+            toolchain = subprocess.run([*shlex.split(self.root_env().get("CC", "")), "--version"], capture_output=True)
+            digest.update(toolchain.stdout)
+        except OSError:
+            pass
+        for path, content in sorted(self.source_overrides.items()):
+            digest.update(path.encode())
+            digest.update(content.encode())
+
+        # Top-level build scripts and every file of the projects, skipping their build outputs
+        files = [name for name in os.listdir(self.root_dir) if name.endswith(".sh")]
+        for project in self.get_projects():
+            project_dir = os.path.join(self.root_dir, project)
+            for dir_path, dir_names, file_names in os.walk(project_dir):
+                dir_names[:] = sorted(d for d in dir_names if not self._is_build_output(d))
+                for name in file_names:
+                    if not self._is_build_output(name):
+                        files.append(os.path.relpath(os.path.join(dir_path, name), self.root_dir))
+        for path in sorted(files):
+            digest.update(path.encode())
+            with open(os.path.join(self.root_dir, path), "rb") as f:
+                digest.update(f.read())
+        return digest.hexdigest()
+
+    @staticmethod
+    def _is_build_output(name: str) -> bool:
+        return any(fnmatch.fnmatch(name, pattern) for pattern in BUILD_OUTPUTS)
+
+    def cached_kernel_path(self, test_code: str) -> str:
+        return os.path.join(self.cache_dir, kernel_cache_key(self.build_digest, test_code), "olympos.kernel")
+
+    def pass_stamp_path(self, unit: Dict[str, Any]) -> str:
+        # A kernel that passed once passes again when the same QEMU boots it with the same command line and the same
+        # harness checks it for the same output. The stamp belongs to the kernel that was booted: a test's own
+        # kernel, or the kernel of a whole batch.
+        use_iso = self.use_iso or unit["needs_grub"]
+        if "tests" in unit:
+            expected = "\n".join(f"{test['name']}:{test['expected']}" for test in unit["tests"])
+        else:
+            expected = unit["expected"]
+        # Only the sandbox paths are left out of the command line, they change with every run
+        boot = [HARNESS_VERSION, qemu_version(), qemu_command(["-cdrom" if use_iso else "-kernel"]), expected]
+        key = hashlib.blake2b(repr(boot).encode(), digest_size=8).hexdigest()
+        return os.path.join(os.path.dirname(self.cached_kernel_path(unit["code"])), f"passed-{key}")
+
+    def record_pass(self, unit: Dict[str, Any]):
+        stamp = self.pass_stamp_path(unit)
+        os.makedirs(os.path.dirname(stamp), exist_ok=True)
+        open(stamp, "w").close()
+
+    def create_test_kernel(self, test_code: str, work_dir: str) -> bool:
+        try:
+            paths = sandbox_paths(work_dir)
+            cached_kernel = self.cached_kernel_path(test_code)
+            if os.path.exists(cached_kernel):
+                if self.verbose:
+                    print("Using cached kernel...")
+                os.makedirs(os.path.dirname(paths.sysroot_kernel), exist_ok=True)
+                self._link_or_copy(cached_kernel, paths.sysroot_kernel)
+                return True
 
-            build_script = self.get_path("build-test.sh")
-            with open(build_script, "w") as f:
-                f.write("#!/bin/sh\n")
-                f.write("# Temporary build script for tests\n")
-                f.write(". ./config.sh\n")
-                f.write(". ./headers.sh\n\n")
-                f.write("# Add TEST define to CFLAGS\n")
-                f.write('export CFLAGS="$CFLAGS -DTEST"\n')
-                f.write('export CPPFLAGS="$CPPFLAGS -DTEST"\n\n')
-                f.write("# Build the projects\n")
-                f.write("for PROJECT in $PROJECTS; do\n")
-                f.write('  (cd $PROJECT && DESTDIR="$SYSROOT" $MAKE install)\n')
-                f.write("done\n")
-            os.chmod(build_script, 0o755)
+            # Only kernel.c changes between tests, so make rebuilds that file and relinks
+            with open(paths.kernel_source, "w") as f:
+                f.write(test_code)
+            # The installed kernel may be a link to a cached one, make must not overwrite that file in place
+            if os.path.exists(paths.sysroot_kernel):
+                os.remove(paths.sysroot_kernel)
 
             if self.verbose:
                 print("Building kernel...")
-                build_cmd = f"cd {self.root_dir} && ./build-test.sh"
-            else:
-                build_cmd = f"cd {self.root_dir} && ./build-test.sh > /dev/null 2>&1"
-            if os.system(build_cmd) != 0:
+            if not self.build_projects(work_dir):
                 return False
 
+            # Copy under a private name first, several workers may store the same kernel at once
+            os.makedirs(os.path.dirname(cached_kernel), exist_ok=True)
+            staging_path = f"{cached_kernel}.{os.getpid()}"
+            self._link_or_copy(paths.sysroot_kernel, staging_path)
+            os.replace(staging_path, cached_kernel)
             return True
         except Exception as e:
             print(f"Error creating test kernel: {e}")
             return False
 
-    def create_test_iso(self) -> bool:
+    @staticmethod
+    def _link_or_copy(source: str, destination: str):
+        # Hard links avoid copying kernel images, the cache and a tmpfs sandbox are usually on different devices
+        if os.path.exists(destination):
+            os.remove(destination)
+        try:
+            os.link(source, destination)
+        except OSError:
+            shutil.copy2(source, destination)
+
+    def create_test_iso(self, work_dir: str) -> bool:
         try:
+            paths = sandbox_paths(work_dir)
             # Create directory structure
-            isodir_test_path = self.get_path("isodir-test")
-            boot_path = os.path.join(isodir_test_path, "boot")
-            grub_path = os.path.join(boot_path, "grub")
-            os.makedirs(grub_path, exist_ok=True)
+            os.makedirs(paths.grub_dir, exist_ok=True)
 
             # Copy kernel from sysroot
-            sysroot_path = self.get_path("sysroot")
-            kernel_source = os.path.join(sysroot_path, "boot", "olympos.kernel")
-            kernel_dest = os.path.join(boot_path, "olympos.kernel")
-            shutil.copy2(kernel_source, kernel_dest)
+            self._link_or_copy(paths.sysroot_kernel, paths.iso_kernel)
+
+            # The GRUB image is mastered once per sandbox, later tests only swap the kernel inside it
+            if os.path.exists(paths.iso) and shutil.which("xorriso"):
+                if self.verbose:
+                    print("Updating test ISO...")
+                update_cmd = [
+                    "xorriso",
+                    "-indev",
+                    "olympos-test.iso",
+                    "-outdev",
+                    "olympos-test.iso.new",
+                    "-boot_image",
+                    "any",
+                    "replay",
+                    "-update",
+                    "isodir-test/boot/olympos.kernel",
+                    "/boot/olympos.kernel",
+                    "-commit",
+                ]
+                if subprocess.run(update_cmd, cwd=work_dir, **self._output_redirect()).returncode == 0:
+                    os.replace(f"{paths.iso}.new", paths.iso)
+                    return True
 
             grub_config = """
             set timeout=0
@@ -94,53 +478,109 @@ class OlymposTestFramework:
                 boot
             }
             """
-            grub_cfg_path = os.path.join(grub_path, "grub.cfg")
-            with open(grub_cfg_path, "w") as f:
+            with open(paths.grub_cfg, "w") as f:
                 f.write(grub_config)
 
             if self.verbose:
                 print("Creating test ISO...")
-                iso_cmd = f"cd {self.root_dir} && grub-mkrescue -o olympos-test.iso isodir-test"
-            else:
-                iso_cmd = f"cd {self.root_dir} && grub-mkrescue -o olympos-test.iso isodir-test > /dev/null 2>&1"
-            return os.system(iso_cmd) == 0
+            iso_cmd = ["grub-mkrescue", "-o", "olympos-test.iso", "isodir-test"]
+            return subprocess.run(iso_cmd, cwd=work_dir, **self._output_redirect()).returncode == 0
         except Exception as e:
             print(f"Error creating test ISO: {e}")
             return False
 
-    def run_qemu(self) -> tuple[int, str]:
-        iso_path = self.get_path("olympos-test.iso")
-        qemu_cmd = [
-            "qemu-system-i386",
-            "-cdrom",
-            iso_path,
-            "-serial",
-            "stdio",
-            "-display",
-            "none",
-            "-device",
-            "isa-debug-exit,iobase=0xf4,iosize=0x04",
-            "-no-reboot",
-        ]
-        result = subprocess.run(qemu_cmd, capture_output=True)
-        output = result.stdout.decode("utf-8", errors="ignore")
-        return result.returncode, output
-
-    def run_test(self, test: Dict[str, Any]) -> bool:
+    def run_qemu(self, work_dir: str, use_iso: bool, expected: str) -> tuple[int, str]:
+        paths = sandbox_paths(work_dir)
+        boot_args = ["-cdrom", paths.iso] if use_iso else ["-kernel", paths.sysroot_kernel]
+        process = subprocess.Popen(qemu_command(boot_args), stdout=subprocess.PIPE, stderr=subprocess.DEVNULL)
+        deadline = time.monotonic() + self.qemu_timeout
+        selector = selectors.DefaultSelector()
+        selector.register(process.stdout, selectors.EVENT_READ)
+        expected_bytes = expected.encode()
+        # A multi-line expected output can start in lines that were already judged
+        lookback = expected_bytes.count(b"\n")
+        output = bytearray()
+        scanned = 0
+        return_code = None
+        try:
+            # Stop as soon as the outcome is known instead of waiting for the guest to exit. The raw pipe is
+            # searched without decoding, only complete lines are judged.
+            while return_code is None:
+                # Wait for output and for the timeout at once, no watchdog thread is needed
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    return_code = QEMU_TIMED_OUT
+                    break
+                if not selector.select(remaining):
+                    continue
+                data = os.read(process.stdout.fileno(), READ_SIZE)
+                if not data:
+                    start = self._window_start(output, scanned, lookback)
+                    return_code = self._judge_output(output[start:], expected_bytes)
+                    break
+                output += data
+                end = output.rfind(b"\n") + 1
+                if end > scanned:
+                    start = self._window_start(output, scanned, lookback)
+                    return_code = self._judge_output(output[start:end], expected_bytes)
+                    scanned = end
+                if len(output) > OUTPUT_SIZE:
+                    excess = len(output) - OUTPUT_SIZE
+                    del output[:excess]
+                    scanned = max(0, scanned - excess)
+        finally:
+            selector.close()
+            process.terminate()
+            try:
+                process.wait(timeout=1)
+            except subprocess.TimeoutExpired:
+                process.kill()
+                process.wait()
+            process.stdout.close()
+
+        if return_code is None:
+            return_code = process.returncode
+        return return_code, output.decode(errors="ignore")
+
+    @staticmethod
+    def _window_start(output: bytearray, scanned: int, lookback: int) -> int:
+        # Start of the search window, the unjudged lines plus the last `lookback` judged ones
+        start = scanned
+        for _ in range(lookback):
+            start = output.rfind(b"\n", 0, max(start - 1, 0)) + 1
+        return start
+
+    @staticmethod
+    def _judge_output(lines: bytes, expected: bytes) -> Optional[int]:
+        # The expected output wins when it is printed before, or on the same line as, the first failure marker
+        found = lines.find(expected)
+        failures = [index for index in (lines.find(marker) for marker in FAILURE_MARKERS) if index != -1]
+        if failures:
+            failure_line_end = lines.find(b"\n", min(failures))
+            if found == -1 or (failure_line_end != -1 and found > failure_line_end):
+                return QEMU_EXIT_FAILURE
+        if found != -1:
+            return QEMU_EXIT_SUCCESS
+        return None
+
+    def run_test(self, test: Dict[str, Any], work_dir: str) -> Dict[str, Any]:
         test_name = test["name"]
-        self.backup_kernel()
         output = ""
+        reason = None
         success = False
 
         try:
-            if not self.create_test_kernel(test["code"]):
-                self.results.append({"name": test_name, "passed": False, "output": "Failed to build test kernel"})
-                return False
-            if not self.create_test_iso():
-                self.results.append({"name": test_name, "passed": False, "output": "Failed to create test ISO"})
-                return False
-            return_code, output = self.run_qemu()
-            success = return_code == 1 and test["expected"] in output
+            if not self.create_test_kernel(test["code"], work_dir):
+                return {"name": test_name, "passed": False, "output": "Failed to build test kernel"}
+            use_iso = self.use_iso or test["needs_grub"]
+            if use_iso and not self.create_test_iso(work_dir):
+                return {"name": test_name, "passed": False, "output": "Failed to create test ISO"}
+            return_code, output = self.run_qemu(work_dir, use_iso, test["expected"])
+            success = return_code == QEMU_EXIT_SUCCESS and test["expected"] in output
+            if success:
+                self.record_pass(test)
+            if return_code == QEMU_TIMED_OUT:
+                reason = "TIMEOUT"
 
             if self.verbose:
                 print(f"Test Output:\n{output}")
@@ -148,55 +588,172 @@ class OlymposTestFramework:
                     print(f"Expected output:\n'{test['expected']}'")
         except Exception as e:
             print(f"run_test failed - {e}")
-        finally:
-            self.restore_kernel()
 
-        self.results.append({"name": test_name, "passed": success, "output": output})
-        return success
+        return {"name": test_name, "passed": success, "output": output, "reason": reason}
+
+    def run_batch(self, batch: Dict[str, Any], work_dir: str) -> list[Dict[str, Any]]:
+        output = ""
+        try:
+            if self.create_test_kernel(batch["code"], work_dir):
+                use_iso = self.use_iso or batch["needs_grub"]
+                if not use_iso or self.create_test_iso(work_dir):
+                    _, output = self.run_qemu(work_dir, use_iso, BATCH_DONE)
+        except Exception as e:
+            print(f"run_batch failed - {e}")
+
+        results = []
+        batch_passed = True
+        for test in batch["tests"]:
+            begin = output.find(BATCH_BEGIN.format(test["name"]))
+            end = output.find(BATCH_END.format(test["name"]), begin) if begin != -1 else -1
+            # Tests the batch did not get through, the failing one and those after it, are run on their own
+            if end == -1:
+                results.append(self.run_test(test, work_dir))
+                batch_passed = False
+                continue
+            test_output = output[begin:end].split("\n", 1)[-1]
+            if self.verbose:
+                print(f"Test Output ({test['name']}):\n{test_output}")
+            passed = test["expected"] in test_output
+            batch_passed = batch_passed and passed
+            results.append({"name": test["name"], "passed": passed, "output": test_output})
+        # Only the batch kernel was booted, so only the batch as a whole is recorded
+        if batch_passed:
+            self.record_pass(batch)
+        return results
+
+    def plan_units(self, tests: list[Dict[str, Any]]) -> list[Dict[str, Any]]:
+        # Batchable tests sharing a template and boot method become one batch, everything else runs alone
+        units = []
+        groups = {}
+        for test in tests:
+            if not self.batch or "batch" not in test:
+                units.append(test)
+                continue
+            key = (test["batch"][0], test["needs_grub"])
+            if key not in groups:
+                groups[key] = {"tests": [], "needs_grub": test["needs_grub"]}
+                units.append(groups[key])
+            groups[key]["tests"].append(test)
+
+        for (template, _), group in groups.items():
+            if len(group["tests"]) == 1:
+                units[units.index(group)] = group["tests"][0]
+                continue
+            prefix, suffix = split_template(template)
+            blocks = [prefix]
+            for test in group["tests"]:
+                blocks.append(
+                    f'serial_write_string(SERIAL_COM1_BASE, "{BATCH_BEGIN.format(test["name"])}\\n");\n'
+                    f"    {{{test['batch'][1]}}}\n"
+                    f'    serial_write_string(SERIAL_COM1_BASE, "{BATCH_END.format(test["name"])}\\n");\n    '
+                )
+            blocks.append(f'serial_write_string(SERIAL_COM1_BASE, "{BATCH_DONE}\\n");')
+            blocks.append(suffix)
+            group["code"] = "".join(blocks)
+        return units
 
     def run_all_tests(self):
         total_test_count = len(self.tests)
         print(f"=== Running {total_test_count} Tests ===")
 
-        for i, test in enumerate(self.tests, 1):
-            result = self.run_test(test)
-            result_message = "PASSED" if result else "FAILED"
-            print(f"[{i}/{total_test_count}] {test['name']}: {result_message}")
+        passed = 0
+        failed_results = []
+        self.render_tests()
+        self.build_digest = self.compute_build_digest()
+
+        # Tests and batches whose kernel already passed are not booted again
+        units = []
+        for unit in self.plan_units(self.tests):
+            if self.use_cache and os.path.exists(self.pass_stamp_path(unit)):
+                for test in unit.get("tests", [unit]):
+                    self.results.append({"name": test["name"], "passed": True, "output": ""})
+                    passed += 1
+                    print(f"[{len(self.results)}/{total_test_count}] {test['name']}: PASSED (cached)")
+            else:
+                units.append(unit)
+        if not units:
+            return self._print_summary(passed, failed_results)
+
+        # Every worker builds and boots its tests inside a private copy of the source tree
+        workers = min(self.jobs, len(units))
+        self.make_jobs = max(1, self.jobs // workers)
+        sandbox_root = tempfile.mkdtemp(prefix="olympos-", dir=self._sandbox_parent(workers))
+        try:
+            with ProcessPoolExecutor(
+                max_workers=workers,
+                initializer=_init_worker,
+                initargs=(os.path.abspath(self.root_dir), sandbox_root, self.worker_options()),
+            ) as executor:
+                self.build_all(executor, units)
+                # GRUB boots and batches take longest, start them first so they do not end up as the tail of the run
+                units.sort(key=lambda unit: (not unit["needs_grub"], "tests" not in unit))
+                futures = [executor.submit(_run_unit_in_worker, unit) for unit in units]
+                for future in as_completed(futures):
+                    for result in future.result():
+                        self.results.append(result)
+                        if result["passed"]:
+                            passed += 1
+                        else:
+                            failed_results.append(result)
+                        result_message = "PASSED" if result["passed"] else "FAILED"
+                        print(f"[{len(self.results)}/{total_test_count}] {result['name']}: {result_message}")
+        finally:
+            shutil.rmtree(sandbox_root, ignore_errors=True)
+
+        # Report in registration order, whatever order the tests finished in
+        order = {test["name"]: index for index, test in enumerate(self.tests)}
+        self.results.sort(key=lambda result: order[result["name"]])
+        failed_results.sort(key=lambda result: order[result["name"]])
+        return self._print_summary(passed, failed_results)
 
+    def _print_summary(self, passed: int, failed_results: list[Dict[str, Any]]) -> bool:
+        total_test_count = len(self.tests)
         print("\n=== Test Summary ===")
-        status_counter = Counter(r["passed"] for r in self.results)
-        passed, failed = status_counter[True], status_counter[False]
-        print(f"Passed: {passed}/{total_test_count} ({passed/total_test_count*100:.1f}%)")
+        print(f"Passed: {passed}/{total_test_count} ({passed * 100 / total_test_count:.1f}%)")
 
-        if failed:
+        if failed_results:
             print("\nFailed Tests:")
-            for result in self.results:
-                if not result["passed"]:
-                    print(f"  - {result['name']}")
+            for result in failed_results:
+                reason = f" ({result['reason']})" if result.get("reason") else ""
+                print(f"  - {result['name']}{reason}")
 
         return passed == total_test_count
 
-    def cleanup(self):
-        files_to_remove = [self.get_path("olympos-test.iso"), self.get_path("build-test.sh")]
-        dirs_to_remove = [self.get_path("isodir-test"), self.get_path("sysroot")]
+    def build_all(self, executor: ProcessPoolExecutor, units: list[Dict[str, Any]]):
+        # Compile every kernel missing from the cache up front, each distinct source once, so that all workers
+        # are kept busy compiling and the boot phase only finds cache hits
+        sources = {}
+        for unit in units:
+            cached_kernel = self.cached_kernel_path(unit["code"])
+            if cached_kernel not in sources and not os.path.exists(cached_kernel):
+                sources[cached_kernel] = unit["code"]
+        if sources:
+            print(f"Building {len(sources)} test kernels...")
+            list(executor.map(_build_in_worker, sources.values()))
 
-        for f in files_to_remove:
-            if os.path.exists(f):
-                os.remove(f)
-        for d in dirs_to_remove:
-            if os.path.exists(d):
-                shutil.rmtree(d)
+    def worker_options(self) -> Dict[str, Any]:
+        return {
+            "verbose": self.verbose,
+            "use_iso": self.use_iso,
+            "qemu_timeout": self.qemu_timeout,
+            "source_overrides": self.source_overrides,
+            "cache_dir": os.path.abspath(self.cache_dir),
+            "build_digest": self.build_digest,
+            "make_jobs": self.make_jobs,
+        }
 
-        if self.verbose:
-            print("Cleaning projects...")
-            clean_cmd = (
-                f"cd {self.root_dir}"
-                f"&& . ./config.sh && for PROJECT in $PROJECTS; do (cd $PROJECT && $MAKE clean); done"
-            )
-        else:
-            clean_cmd = (
-                f"cd {self.root_dir} && . ./config.sh "
-                f"&& for PROJECT in $PROJECTS; do (cd $PROJECT && $MAKE clean); done > /dev/null 2>&1"
-            )
+    def _sandbox_parent(self, workers: int):
+        # Keep build artifacts in RAM when possible, otherwise fall back to the default temporary directory
+        if os.path.isdir(TMPFS_DIR) and os.access(TMPFS_DIR, os.W_OK):
+            if shutil.disk_usage(TMPFS_DIR).free >= workers * SANDBOX_SIZE:
+                return TMPFS_DIR
+        return None
+
+    def get_projects(self) -> list[str]:
+        return self.root_env().get("PROJECTS", "").split()
 
-        os.system(clean_cmd)
+    def _output_redirect(self) -> Dict[str, Any]:
+        if self.verbose:
+            return {}
+        return {"stdout": subprocess.DEVNULL, "stderr": subprocess.DEVNULL}
@@ -1,4 +1,4 @@
-from test_framework import OlymposTestFramework
+from test_framework import TEST_PASS, OlymposTestFramework
 
 GDT_TEST_TEMPLATE = """
 #include <stdio.h>
@@ -8,33 +8,24 @@ GDT_TEST_TEMPLATE = """
 #include <kernel/tty.h>
 #include <kernel/gdt.h>
 
-// Exit QEMU function
-void exit_qemu(uint32_t exit_code) {{
-    asm volatile("outl %0, %1" : : "a"(exit_code), "Nd"((uint16_t)0xf4));
-}}
+#include "olympos_test_harness.h"
 
-void kernel_main(unsigned long magic, unsigned long addr) {{
+void test_setup(unsigned long magic, unsigned long addr) {
     terminal_initialize();
     gdt_init();
-    
+}
+
+void run_test_body(void) {
     // Test code
     {test_body}
-    
-    // Exit QEMU with success
-    exit_qemu(0);
-    
-    // Halt if exit failed
-    while(1) {{
-        asm volatile("hlt");
-    }}
-}}
+}
 """
 
 
 def register_gdt_tests(framework: OlymposTestFramework):
     # Test 1: GDT segments verification
     test_body = """
-    printf("TEST_RUNNING\\n");
+    printf(TEST_RUNNING_MSG);
     
     uint16_t cs, ds, ss, es, fs, gs;
     asm volatile("mov %%cs, %0" : "=r"(cs));
@@ -54,13 +45,12 @@ def register_gdt_tests(framework: OlymposTestFramework):
     
     if (cs == 0x08 && ds == 0x10 && ss == 0x10 && es == 0x10 && fs == 0x10 && gs == 0x10) {
         printf("All segments correctly set\\n");
-        printf("TEST_PASS\\n");
+        printf(TEST_PASS_MSG);
     }
     else {
         printf("Some segments incorrect\\n");
+        printf(TEST_FAIL_MSG);
     }
     """
 
-    framework.register_test(
-        name="gdt_all_segments", test_code=GDT_TEST_TEMPLATE.format(test_body=test_body), expected_output="TEST_PASS"
-    )
\ No newline at end of file
+    framework.register_tests([("gdt_all_segments", GDT_TEST_TEMPLATE, test_body, TEST_PASS)])
@@ -1,4 +1,4 @@
-from test_framework import OlymposTestFramework
+from test_framework import TEST_PASS, OlymposTestFramework
 
 INTERRUPT_TEST_TEMPLATE = """
 #include <stdio.h>
@@ -9,34 +9,27 @@ INTERRUPT_TEST_TEMPLATE = """
 #include <kernel/gdt.h>
 #include <kernel/interrupts.h>
 
-// Exit QEMU function
-void exit_qemu(uint32_t exit_code) {{
-    asm volatile("outl %0, %1" : : "a"(exit_code), "Nd"((uint16_t)0xf4));
-}}
+#include "olympos_test_harness.h"
 
-void kernel_main(unsigned long magic, unsigned long addr) {{
+void test_setup(unsigned long magic, unsigned long addr) {
     terminal_initialize();
     gdt_init();
     idt_init();
+}
 
+void run_test_body(void) {
     // Test code
     {test_body}
-
-    // Exit QEMU with success
-    exit_qemu(0);
-
-    // Halt if exit failed
-    while(1) {{
-        asm volatile("hlt");
-    }}
-}}
+}
 """
 
-
-def register_interrupt_tests(framework: OlymposTestFramework):
+# Name and C body of every interrupt test, in registration order
+INTERRUPT_TESTS = (
     # Test 1: Basic interrupt system initialization
-    test_body = """
-    printf("TEST_RUNNING\\n");
+    (
+        "interrupt_system_init",
+        """
+    printf(TEST_RUNNING_MSG);
 
     // Test that interrupt system is initialized
     printf("Testing interrupt system initialization...\\n");
@@ -49,29 +42,25 @@ def register_interrupt_tests(framework: OlymposTestFramework):
     int result = register_isr(0, test_handler);
     if (result == 0) {
         printf("ISR registration successful\\n");
-        printf("TEST_PASS\\n");
+        printf(TEST_PASS_MSG);
     }
     else {
         printf("ISR registration failed\\n");
-        printf("TEST_FAIL\\n");
+        printf(TEST_FAIL_MSG);
     }
-    """
-
-    framework.register_test(
-        name="interrupt_system_init",
-        test_code=INTERRUPT_TEST_TEMPLATE.format(test_body=test_body),
-        expected_output="TEST_PASS",
-    )
-
+    """,
+    ),
     # Test 2: Division By Zero exception (Exception 0) - with custom handler
-    test_body = """
-    printf("TEST_RUNNING\\n");
+    (
+        "interrupt_division_by_zero",
+        """
+    printf(TEST_RUNNING_MSG);
 
     // Custom handler for Division By Zero
     void division_by_zero_handler(regs_t* r) {
         printf("Division By Zero exception caught!\\n");
         printf("Exception number: %u\\n", r->int_no);
-        printf("TEST_PASS\\n");
+        printf(TEST_PASS_MSG);
         exit_qemu(0);
     }
 
@@ -87,18 +76,14 @@ def register_interrupt_tests(framework: OlymposTestFramework):
 
     // If we reach here, the exception wasn't caught
     printf("ERROR: Division by zero not caught!\\n");
-    printf("TEST_FAIL\\n");
-    """
-
-    framework.register_test(
-        name="interrupt_division_by_zero",
-        test_code=INTERRUPT_TEST_TEMPLATE.format(test_body=test_body),
-        expected_output="TEST_PASS",
-    )
-
+    printf(TEST_FAIL_MSG);
+    """,
+    ),
     # Test 3: Multiple handler registration
-    test_body = """
-    printf("TEST_RUNNING\\n");
+    (
+        "interrupt_multiple_handlers",
+        """
+    printf(TEST_RUNNING_MSG);
 
     // Test registering multiple handlers
     void handler1(regs_t* r) {
@@ -114,23 +99,19 @@ def register_interrupt_tests(framework: OlymposTestFramework):
 
     if (result1 == 0 && result2 == 0 && result3 == 0) {
         printf("Multiple handler registration successful\\n");
-        printf("TEST_PASS\\n");
+        printf(TEST_PASS_MSG);
     }
     else {
         printf("Multiple handler registration failed\\n");
-        printf("TEST_FAIL\\n");
+        printf(TEST_FAIL_MSG);
     }
-    """
-
-    framework.register_test(
-        name="interrupt_multiple_handlers",
-        test_code=INTERRUPT_TEST_TEMPLATE.format(test_body=test_body),
-        expected_output="TEST_PASS",
-    )
-
+    """,
+    ),
     # Test 4: Invalid ISR number handling
-    test_body = """
-    printf("TEST_RUNNING\\n");
+    (
+        "interrupt_invalid_isr",
+        """
+    printf(TEST_RUNNING_MSG);
 
     void test_handler(regs_t* r) {
         printf("Handler called\\n");
@@ -143,16 +124,18 @@ def register_interrupt_tests(framework: OlymposTestFramework):
 
     if (result1 == -1 && result2 == -1 && result3 == -1) {
         printf("Invalid ISR number handling correct\\n");
-        printf("TEST_PASS\\n");
+        printf(TEST_PASS_MSG);
     }
     else {
         printf("Invalid ISR number handling incorrect\\n");
-        printf("TEST_FAIL\\n");
+        printf(TEST_FAIL_MSG);
     }
-    """
+    """,
+    ),
+)
+
 
-    framework.register_test(
-        name="interrupt_invalid_isr",
-        test_code=INTERRUPT_TEST_TEMPLATE.format(test_body=test_body),
-        expected_output="TEST_PASS",
+def register_interrupt_tests(framework: OlymposTestFramework):
+    framework.register_tests(
+        (name, INTERRUPT_TEST_TEMPLATE, test_body, TEST_PASS) for name, test_body in INTERRUPT_TESTS
     )
@@ -1,4 +1,4 @@
-from test_framework import OlymposTestFramework
+from test_framework import TEST_PASS, OlymposTestFramework
 
 KHEAP_TEST_TEMPLATE = """
 #include <kernel/serial.h>
@@ -9,12 +9,9 @@ KHEAP_TEST_TEMPLATE = """
 #include <stdint.h>
 #include <string.h>
 
-// Exit QEMU function
-void exit_qemu(uint32_t exit_code) {{
-    asm volatile("outl %0, %1" : : "a"(exit_code), "Nd"((uint16_t)0xf4));
-}}
+#include "olympos_test_harness.h"
 
-void kernel_main(unsigned long magic, unsigned long addr) {{
+void test_setup(unsigned long magic, unsigned long addr) {
     // Initialize serial port
     serial_setup(SERIAL_COM1_BASE, SERIAL_BAUD_115200);
     serial_write_string(SERIAL_COM1_BASE, "Heap allocator test starting...\\n");
@@ -27,26 +24,22 @@ void kernel_main(unsigned long magic, unsigned long addr) {{
     serial_write_string(SERIAL_COM1_BASE, "Initializing heap allocator...\\n");
     kheap_init();
     serial_write_string(SERIAL_COM1_BASE, "Heap initialized.\\n\\n");
+}
 
+void run_test_body(void) {
     // Test code
     {test_body}
 
-    serial_write_string(SERIAL_COM1_BASE, "TEST_PASS\\n");
-
-    // Exit QEMU with success
-    exit_qemu(0);
-
-    // Halt if exit failed
-    while(1) {{
-        asm volatile("hlt");
-    }}
-}}
+    serial_write_string(SERIAL_COM1_BASE, TEST_PASS_MSG);
+}
 """
 
-
-def register_kheap_tests(framework: OlymposTestFramework):
+# Name and C body of every kheap test, in registration order
+KHEAP_TESTS = (
     # Test 1: Basic allocation
-    test_body = """
+    (
+        "kheap_basic_alloc",
+        """
     serial_write_string(SERIAL_COM1_BASE, "Testing basic allocation...\\n");
 
     void* ptr1 = kmalloc(64);
@@ -69,16 +62,12 @@ def register_kheap_tests(framework: OlymposTestFramework):
         exit_qemu(1);
     }
     serial_write_string(SERIAL_COM1_BASE, "Pointers are unique\\n");
-    """
-
-    framework.register_test(
-        name="kheap_basic_alloc",
-        test_code=KHEAP_TEST_TEMPLATE.format(test_body=test_body),
-        expected_output="TEST_PASS"
-    )
-
+    """,
+    ),
     # Test 2: Allocation and deallocation
-    test_body = """
+    (
+        "kheap_alloc_free",
+        """
     serial_write_string(SERIAL_COM1_BASE, "Testing allocation and deallocation...\\n");
 
     void* ptr1 = kmalloc(100);
@@ -108,16 +97,12 @@ def register_kheap_tests(framework: OlymposTestFramework):
     kfree(ptr3);
     kfree(ptr4);
     serial_write_string(SERIAL_COM1_BASE, "All memory freed\\n");
-    """
-
-    framework.register_test(
-        name="kheap_alloc_free",
-        test_code=KHEAP_TEST_TEMPLATE.format(test_body=test_body),
-        expected_output="TEST_PASS"
-    )
-
+    """,
+    ),
     # Test 3: Memory operations
-    test_body = """
+    (
+        "kheap_memory_ops",
+        """
     serial_write_string(SERIAL_COM1_BASE, "Testing memory operations...\\n");
 
     char* str1 = (char*) kmalloc(100);
@@ -153,16 +138,12 @@ def register_kheap_tests(framework: OlymposTestFramework):
     serial_write_string(SERIAL_COM1_BASE, "Data integrity verified\\n");
 
     kfree(str1);
-    """
-
-    framework.register_test(
-        name="kheap_memory_ops",
-        test_code=KHEAP_TEST_TEMPLATE.format(test_body=test_body),
-        expected_output="TEST_PASS"
-    )
-
+    """,
+    ),
     # Test 4: Multiple allocations and frees (stress test)
-    test_body = """
+    (
+        "kheap_stress",
+        """
     serial_write_string(SERIAL_COM1_BASE, "Testing multiple allocations...\\n");
 
     #define NUM_ALLOCS 10
@@ -201,16 +182,12 @@ def register_kheap_tests(framework: OlymposTestFramework):
     serial_write_string(SERIAL_COM1_BASE, "Large allocation successful (coalescing works!)\\n");
 
     kfree(large);
-    """
-
-    framework.register_test(
-        name="kheap_stress",
-        test_code=KHEAP_TEST_TEMPLATE.format(test_body=test_body),
-        expected_output="TEST_PASS"
-    )
-
+    """,
+    ),
     # Test 5: Edge cases
-    test_body = """
+    (
+        "kheap_edge_cases",
+        """
     serial_write_string(SERIAL_COM1_BASE, "Testing edge cases...\\n");
 
     // Test zero-size allocation
@@ -242,10 +219,12 @@ def register_kheap_tests(framework: OlymposTestFramework):
     }
     serial_write_string(SERIAL_COM1_BASE, "Medium (1 KiB) allocation successful\\n");
     kfree(ptr_medium);
-    """
+    """,
+    ),
+)
 
-    framework.register_test(
-        name="kheap_edge_cases",
-        test_code=KHEAP_TEST_TEMPLATE.format(test_body=test_body),
-        expected_output="TEST_PASS"
+
+def register_kheap_tests(framework: OlymposTestFramework):
+    framework.register_tests(
+        ((name, KHEAP_TEST_TEMPLATE, test_body, TEST_PASS) for name, test_body in KHEAP_TESTS), needs_grub=True
     )
@@ -1,4 +1,4 @@
-from test_framework import OlymposTestFramework
+from test_framework import TEST_PASS, OlymposTestFramework
 
 PAGING_TEST_TEMPLATE = """
 #include <kernel/serial.h>
@@ -8,12 +8,9 @@ PAGING_TEST_TEMPLATE = """
 #include <stdint.h>
 #include <string.h>
 
-// Exit QEMU function
-void exit_qemu(uint32_t exit_code) {{
-    asm volatile("outl %0, %1" : : "a"(exit_code), "Nd"((uint16_t)0xf4));
-}}
+#include "olympos_test_harness.h"
 
-void kernel_main(unsigned long magic, unsigned long addr) {{
+void test_setup(unsigned long magic, unsigned long addr) {
     // Initialize serial port
     serial_setup(SERIAL_COM1_BASE, SERIAL_BAUD_115200);
     serial_write_string(SERIAL_COM1_BASE, "Paging test starting...\\n");
@@ -21,26 +18,22 @@ void kernel_main(unsigned long magic, unsigned long addr) {{
     // Initialize debug (needed for elf_sections_end)
     multiboot_info_t* mbi = (multiboot_info_t*) addr;
     debug_initialize(mbi);
-    
+}
+
+void run_test_body(void) {
     // Test code
     {test_body}
     
-    serial_write_string(SERIAL_COM1_BASE, "TEST_PASS\\n");
-    
-    // Exit QEMU with success
-    exit_qemu(0);
-    
-    // Halt if exit failed
-    while(1) {{
-        asm volatile("hlt");
-    }}
-}}
+    serial_write_string(SERIAL_COM1_BASE, TEST_PASS_MSG);
+}
 """
 
-
-def register_paging_tests(framework: OlymposTestFramework):
+# Name and C body of every paging test, in registration order
+PAGING_TESTS = (
     # Test 1: Basic paging initialization
-    test_body = """
+    (
+        "paging_init",
+        """
     serial_write_string(SERIAL_COM1_BASE, "Initializing paging...\\n");
     paging_init();
     serial_write_string(SERIAL_COM1_BASE, "Paging initialized successfully!\\n");
@@ -49,16 +42,12 @@ def register_paging_tests(framework: OlymposTestFramework):
     volatile uint32_t* test_addr = (volatile uint32_t*)0x100000;  // 1 MB mark
     uint32_t value = *test_addr;
     serial_write_string(SERIAL_COM1_BASE, "Read from identity-mapped memory successful!\\n");
-    """
-
-    framework.register_test(
-        name="paging_init",
-        test_code=PAGING_TEST_TEMPLATE.format(test_body=test_body),
-        expected_output="TEST_PASS"
-    )
-
+    """,
+    ),
     # Test 2: Frame allocation
-    test_body = """
+    (
+        "paging_frame_alloc",
+        """
     serial_write_string(SERIAL_COM1_BASE, "Initializing paging...\\n");
     paging_init();
     
@@ -87,16 +76,12 @@ def register_paging_tests(framework: OlymposTestFramework):
     }
     
     serial_write_string(SERIAL_COM1_BASE, "Frame management tests passed!\\n");
-    """
-
-    framework.register_test(
-        name="paging_frame_alloc",
-        test_code=PAGING_TEST_TEMPLATE.format(test_body=test_body),
-        expected_output="TEST_PASS"
-    )
-
+    """,
+    ),
     # Test 3: Page fault detection
-    test_body = """
+    (
+        "paging_fault_detection",
+        """
     serial_write_string(SERIAL_COM1_BASE, "Initializing paging...\\n");
     paging_init();
     
@@ -115,10 +100,12 @@ def register_paging_tests(framework: OlymposTestFramework):
     
     serial_write_string(SERIAL_COM1_BASE, "Page fault detection test passed!\\n");
     serial_write_string(SERIAL_COM1_BASE, "NOTE: Actual fault triggering tested in manual demo\\n");
-    """
+    """,
+    ),
+)
+
 
-    framework.register_test(
-        name="paging_fault_detection",
-        test_code=PAGING_TEST_TEMPLATE.format(test_body=test_body),
-        expected_output="TEST_PASS"
+def register_paging_tests(framework: OlymposTestFramework):
+    framework.register_tests(
+        ((name, PAGING_TEST_TEMPLATE, test_body, TEST_PASS) for name, test_body in PAGING_TESTS), needs_grub=True
     )
@@ -1,4 +1,4 @@
-from test_framework import OlymposTestFramework
+from test_framework import TEST_PASS, OlymposTestFramework
 
 PIC_TEST_TEMPLATE = """
 #include <stdio.h>
@@ -6,6 +6,7 @@ PIC_TEST_TEMPLATE = """
 #include <stddef.h>
 
 #include <kernel/tty.h>
+#include <kernel/serial.h>
 #include <kernel/gdt.h>
 #include <kernel/interrupts.h>
 
@@ -17,34 +18,32 @@ extern uint16_t pic_get_irr(void);
 extern uint16_t pic_get_isr(void);
 extern void pic_send_eoi(uint8_t irq);
 
-// Exit QEMU function
-void exit_qemu(uint32_t exit_code) {{
-    asm volatile("outl %0, %1" : : "a"(exit_code), "Nd"((uint16_t)0xf4));
-}}
+// Port I/O (from io.h)
+extern void outb(unsigned short port, unsigned char data);
+extern unsigned char inb(unsigned short port);
 
-void kernel_main(unsigned long magic, unsigned long addr) {{
+#include "olympos_test_harness.h"
+
+void test_setup(unsigned long magic, unsigned long addr) {
     terminal_initialize();
+    serial_setup(SERIAL_COM1_BASE, SERIAL_BAUD_115200);
     gdt_init();
     idt_init();
+}
 
+void run_test_body(void) {
     // Test code
     {test_body}
-
-    // Exit QEMU with success
-    exit_qemu(0);
-
-    // Halt if exit failed
-    while(1) {{
-        asm volatile("hlt");
-    }}
-}}
+}
 """
 
-
-def register_pic_tests(framework: OlymposTestFramework):
+# Name and C body of every PIC test, in registration order
+PIC_TESTS = (
     # Test 1: PIC initialization - all IRQs should be masked after init
-    test_body = """
-    printf("TEST_RUNNING\\n");
+    (
+        "pic_initialization",
+        """
+    printf(TEST_RUNNING_MSG);
     
     // After idt_init(), PIC should be remapped and all IRQs masked (0xFFFF)
     uint16_t irr = pic_get_irr();
@@ -55,23 +54,19 @@ def register_pic_tests(framework: OlymposTestFramework):
     // IRR should be 0 (no pending interrupts) since all are masked
     if (irr == 0) {
         printf("PIC initialized correctly - no pending interrupts\\n");
-        printf("TEST_PASS\\n");
+        printf(TEST_PASS_MSG);
     }
     else {
         printf("Unexpected IRR value\\n");
-        printf("TEST_FAIL\\n");
+        printf(TEST_FAIL_MSG);
     }
-    """
-    
-    framework.register_test(
-        name="pic_initialization",
-        test_code=PIC_TEST_TEMPLATE.format(test_body=test_body),
-        expected_output="TEST_PASS",
-    )
-
+    """,
+    ),
     # Test 2: PIC ISR/IRR reading functionality
-    test_body = """
-    printf("TEST_RUNNING\\n");
+    (
+        "pic_isr_irr_reading",
+        """
+    printf(TEST_RUNNING_MSG);
     
     // Test that we can read ISR and IRR
     uint16_t irr = pic_get_irr();
@@ -84,23 +79,19 @@ def register_pic_tests(framework: OlymposTestFramework):
     // After initialization with no interrupts fired, ISR should be 0
     if (isr == 0) {
         printf("ISR correctly reads as 0 (no interrupts being serviced)\\n");
-        printf("TEST_PASS\\n");
+        printf(TEST_PASS_MSG);
     }
     else {
         printf("Unexpected ISR value: 0x%x\\n", isr);
-        printf("TEST_FAIL\\n");
+        printf(TEST_FAIL_MSG);
     }
-    """
-    
-    framework.register_test(
-        name="pic_isr_irr_reading",
-        test_code=PIC_TEST_TEMPLATE.format(test_body=test_body),
-        expected_output="TEST_PASS",
-    )
-
+    """,
+    ),
     # Test 3: PIC mask/unmask functionality
-    test_body = """
-    printf("TEST_RUNNING\\n");
+    (
+        "pic_mask_unmask",
+        """
+    printf(TEST_RUNNING_MSG);
     
     printf("Testing PIC mask/unmask...\\n");
     
@@ -133,18 +124,14 @@ def register_pic_tests(framework: OlymposTestFramework):
     
     // If we got here without crashing, the functions work
     printf("Mask/unmask operations completed\\n");
-    printf("TEST_PASS\\n");
-    """
-    
-    framework.register_test(
-        name="pic_mask_unmask",
-        test_code=PIC_TEST_TEMPLATE.format(test_body=test_body),
-        expected_output="TEST_PASS",
-    )
-
+    printf(TEST_PASS_MSG);
+    """,
+    ),
     # Test 4: PIC remapping
-    test_body = """
-    printf("TEST_RUNNING\\n");
+    (
+        "pic_remapping",
+        """
+    printf(TEST_RUNNING_MSG);
     
     printf("Testing PIC remapping...\\n");
     
@@ -162,51 +149,72 @@ def register_pic_tests(framework: OlymposTestFramework):
     // ISR should be 0 (no active interrupts)
     if (isr == 0) {
         printf("PIC remapping successful\\n");
-        printf("TEST_PASS\\n");
+        printf(TEST_PASS_MSG);
     }
     else {
         printf("Unexpected ISR after remap\\n");
-        printf("TEST_FAIL\\n");
+        printf(TEST_FAIL_MSG);
     }
-    """
-    
-    framework.register_test(
-        name="pic_remapping",
-        test_code=PIC_TEST_TEMPLATE.format(test_body=test_body),
-        expected_output="TEST_PASS",
-    )
-
+    """,
+    ),
     # Test 5: Test all 16 IRQ lines mask/unmask
-    test_body = """
-    printf("TEST_RUNNING\\n");
+    (
+        "pic_all_irqs",
+        """
+    printf(TEST_RUNNING_MSG);
     
     printf("Testing all 16 IRQ lines...\\n");
     
     int success = 1;
     
-    // Test unmasking all IRQs
-    for (int i = 0; i < 16; i++) {
-        pic_unmask(i);
+    // Unmask all IRQs by writing both mask registers directly
+    outb(0x21, 0x00);
+    outb(0xA1, 0x00);
+    if (inb(0x21) != 0x00 || inb(0xA1) != 0x00) {
+        printf("IRQs still masked after unmasking all\\n");
+        success = 0;
     }
     printf("Unmasked all 16 IRQs\\n");
     
-    // Test masking all IRQs
-    for (int i = 0; i < 16; i++) {
-        pic_mask(i);
+    // Mask all IRQs again
+    outb(0x21, 0xFF);
+    outb(0xA1, 0xFF);
+    if (inb(0x21) != 0xFF || inb(0xA1) != 0xFF) {
+        printf("IRQs still unmasked after masking all\\n");
+        success = 0;
     }
     printf("Masked all 16 IRQs\\n");
     
+    // Exercise the helpers on the first and last line of each PIC
+    static const uint8_t irqs[] = {0, 7, 8, 15};
+    for (int i = 0; i < 4; i++) {
+        uint16_t port = irqs[i] < 8 ? 0x21 : 0xA1;
+        uint8_t bit = 1 << (irqs[i] & 7);
+        pic_unmask(irqs[i]);
+        if (inb(port) & bit) {
+            success = 0;
+        }
+        pic_mask(irqs[i]);
+        if (!(inb(port) & bit)) {
+            success = 0;
+        }
+    }
+    
     if (success) {
         printf("All IRQ mask/unmask operations successful\\n");
-        printf("TEST_PASS\\n");
+        printf(TEST_PASS_MSG);
     }
     else {
-        printf("TEST_FAIL\\n");
+        printf(TEST_FAIL_MSG);
     }
-    """
-    
-    framework.register_test(
-        name="pic_all_irqs",
-        test_code=PIC_TEST_TEMPLATE.format(test_body=test_body),
-        expected_output="TEST_PASS",
-    )
+    """,
+    ),
+)
+
+
+def register_pic_tests(framework: OlymposTestFramework):
+    # The PIC tests leave every IRQ masked again, so they are booted together in one kernel
+    for name, test_body in PIC_TESTS:
+        framework.register_batchable_test(
+            name=name, template=PIC_TEST_TEMPLATE, test_body=test_body, expected_output=TEST_PASS
+        )
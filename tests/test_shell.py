@@ -1,38 +1,34 @@
-from test_framework import OlymposTestFramework
+from test_framework import TEST_PASS, OlymposTestFramework
 
 SHELL_TEST_TEMPLATE = """
+#include <stdio.h>
+#include <string.h>
+
 #include <kernel/serial.h>
 #include <kernel/kheap.h>
 #include <kernel/shell.h>
 
-// Exit QEMU function
-void exit_qemu(uint32_t exit_code) {{
-    asm volatile("outl %0, %1" : : "a"(exit_code), "Nd"((uint16_t)0xf4));
-}}
+#include "olympos_test_harness.h"
 
-void kernel_main(unsigned long magic, unsigned long addr) {{
+void test_setup(unsigned long magic, unsigned long addr) {
     paging_init();
     kheap_init();
     terminal_initialize();
     serial_setup(SERIAL_COM1_BASE, SERIAL_BAUD_115200);
     
-    serial_write_string(SERIAL_COM1_BASE, "TEST_RUNNING\\n");
-        
+    serial_write_string(SERIAL_COM1_BASE, TEST_RUNNING_MSG);
+}
+
+void run_test_body(void) {
     // Test code
     {test_body}
-    
-    // Exit QEMU with success
-    exit_qemu(0);
-    
-    // Halt if exit failed
-    while(1) {{
-        asm volatile("hlt");
-    }}
-}}
+}
 """
 
 
 def register_shell_tests(framework: OlymposTestFramework):
+    specs = []
+
     # Test 1: Built-in command count
     test_body = """
     int count = shell_num_builtins();
@@ -41,178 +37,101 @@ def register_shell_tests(framework: OlymposTestFramework):
     serial_write_string(SERIAL_COM1_BASE, buffer);
     
     if (count == 2) {
-        serial_write_string(SERIAL_COM1_BASE, "TEST_PASS\\n");
+        serial_write_string(SERIAL_COM1_BASE, TEST_PASS_MSG);
     }
     else {
-        serial_write_string(SERIAL_COM1_BASE, "TEST_FAIL\\n");
+        serial_write_string(SERIAL_COM1_BASE, TEST_FAIL_MSG);
     }
     """
 
-    framework.register_test(
-        name="shell_builtin_count",
-        test_code=SHELL_TEST_TEMPLATE.format(test_body=test_body),
-        expected_output="TEST_PASS"
-    )
+    specs.append(("shell_builtin_count", SHELL_TEST_TEMPLATE, test_body, TEST_PASS))
 
-    # Test 2: Parse empty line
-    test_body = """   
-    char line[] = "";
-    char** tokens = parse_line(line);
-    
-    if (tokens != NULL && tokens[0] == NULL) {
-        serial_write_string(SERIAL_COM1_BASE, "Empty line parsed correctly\\n");
-        serial_write_string(SERIAL_COM1_BASE, "TEST_PASS\\n");
-    }
-    else {
-        serial_write_string(SERIAL_COM1_BASE, "TEST_FAIL\\n");
-    }
-    """
-
-    framework.register_test(
-        name="shell_parse_empty_line",
-        test_code=SHELL_TEST_TEMPLATE.format(test_body=test_body),
-        expected_output="TEST_PASS"
-    )
-
-    # Test 3: Parse command with arguments
+    # Test 2: Parse lines, one case per table entry
     test_body = """
-    char line[] = "test hello world";
-    char** tokens = parse_line(line);
-    
-    int pass = 0;
-    if (tokens != NULL && tokens[0] != NULL) {
-        if (strcmp(tokens[0], "test") == 0 && tokens[1] != NULL && strcmp(tokens[1], "hello") == 0 &&
-            tokens[2] != NULL && strcmp(tokens[2], "world") == 0 && tokens[3] == NULL) {
-            serial_write_string(SERIAL_COM1_BASE, "Command with arguments parsed correctly\\n");
-            pass = 1;
+    static const struct {
+        const char* input;
+        const char* tokens[4];
+    } cases[] = {
+        {"", {NULL}},
+        {"test hello world", {"test", "hello", "world", NULL}},
+        {"  help   ", {"help", NULL}},
+    };
+    
+    int pass = 1;
+    for (int i = 0; i < (int) (sizeof(cases) / sizeof(cases[0])); i++) {
+        char line[32];
+        memcpy(line, cases[i].input, strlen(cases[i].input) + 1);
+        char** tokens = parse_line(line);
+    
+        int t = 0;
+        while (tokens != NULL && tokens[t] != NULL && cases[i].tokens[t] != NULL &&
+               strcmp(tokens[t], cases[i].tokens[t]) == 0) {
+            t++;
         }
+        if (tokens == NULL || tokens[t] != NULL || cases[i].tokens[t] != NULL) {
+            char buffer[64];
+            snprintf(buffer, sizeof(buffer), "Parse failed for \\"%s\\"\\n", cases[i].input);
+            serial_write_string(SERIAL_COM1_BASE, buffer);
+            pass = 0;
+        }
+        kfree(tokens);
     }
     
-    if (pass) {
-        serial_write_string(SERIAL_COM1_BASE, "TEST_PASS\\n");
-    }
-    else {
-        serial_write_string(SERIAL_COM1_BASE, "TEST_FAIL\\n");
+    // A full array keeps its terminating NULL and drops the remaining tokens
+    char long_line[] = "one two three";
+    char* few[3];
+    if (parse_line_into(long_line, few, 3) != 2 || strcmp(few[1], "two") != 0 || few[2] != NULL) {
+        serial_write_string(SERIAL_COM1_BASE, "parse_line_into overflowed its array\\n");
+        pass = 0;
     }
-    """
-
-    framework.register_test(
-        name="shell_parse_command_with_args",
-        test_code=SHELL_TEST_TEMPLATE.format(test_body=test_body),
-        expected_output="TEST_PASS"
-    )
-
-    # Test 4: Parse command with multiple spaces
-    test_body = """  
-    char line[] = "  help   ";
-    char** tokens = parse_line(line);
     
-    int pass = 0;
-    if (tokens != NULL && tokens[0] != NULL) {
-        if (strcmp(tokens[0], "help") == 0 && tokens[1] == NULL) {
-            serial_write_string(SERIAL_COM1_BASE, "Command with extra spaces parsed correctly\\n");
-            pass = 1;
-        }
+    // An empty array stores nothing, not even the terminating NULL
+    char* none[1] = {long_line};
+    if (parse_line_into(long_line, none, 0) != 0 || none[0] != long_line) {
+        serial_write_string(SERIAL_COM1_BASE, "parse_line_into wrote to an empty array\\n");
+        pass = 0;
     }
     
     if (pass) {
-        serial_write_string(SERIAL_COM1_BASE, "TEST_PASS\\n");
+        serial_write_string(SERIAL_COM1_BASE, "All lines parsed correctly\\n");
+        serial_write_string(SERIAL_COM1_BASE, TEST_PASS_MSG);
     }
     else {
-        serial_write_string(SERIAL_COM1_BASE, "TEST_FAIL\\n");
+        serial_write_string(SERIAL_COM1_BASE, TEST_FAIL_MSG);
     }
     """
 
-    framework.register_test(
-        name="shell_parse_extra_spaces",
-        test_code=SHELL_TEST_TEMPLATE.format(test_body=test_body),
-        expected_output="TEST_PASS"
-    )
+    specs.append(("shell_parse_line", SHELL_TEST_TEMPLATE, test_body, TEST_PASS))
 
-    # Test 5: Execute valid help command
+    # Test 3: Execute built-in, unknown and empty commands, all of which keep the shell running
     test_body = """
-    char line[] = "help";
-    char** tokens = parse_line(line);
-    
-    int result = shell_execute(tokens);
-    
-    if (result == 1) {
-        serial_write_string(SERIAL_COM1_BASE, "Help command executed successfully\\n");
-        serial_write_string(SERIAL_COM1_BASE, "TEST_PASS\\n");
-    }
-    else {
-        serial_write_string(SERIAL_COM1_BASE, "TEST_FAIL\\n");
-    }
-    """
-
-    framework.register_test(
-        name="shell_execute_help",
-        test_code=SHELL_TEST_TEMPLATE.format(test_body=test_body),
-        expected_output="TEST_PASS"
-    )
-
-    # Test 6: Execute valid clear command
-    test_body = """
-    char line[] = "clear";
-    char** tokens = parse_line(line);
-    
-    int result = shell_execute(tokens);
-    
-    if (result == 1) {
-        serial_write_string(SERIAL_COM1_BASE, "Clear command executed successfully\\n");
-        serial_write_string(SERIAL_COM1_BASE, "TEST_PASS\\n");
-    }
-    else {
-        serial_write_string(SERIAL_COM1_BASE, "TEST_FAIL\\n");
+    static const char* const commands[] = {"help", "clear", "unknowncommand", ""};
+    
+    // One token array on the stack is reused for every command
+    char* tokens[16];
+    int pass = 1;
+    for (int i = 0; i < (int) (sizeof(commands) / sizeof(commands[0])); i++) {
+        char line[32];
+        memcpy(line, commands[i], strlen(commands[i]) + 1);
+        parse_line_into(line, tokens, 16);
+    
+        if (shell_execute(tokens) != 1) {
+            char buffer[64];
+            snprintf(buffer, sizeof(buffer), "Execute failed for \\"%s\\"\\n", commands[i]);
+            serial_write_string(SERIAL_COM1_BASE, buffer);
+            pass = 0;
+        }
     }
-    """
-
-    framework.register_test(
-        name="shell_execute_clear",
-        test_code=SHELL_TEST_TEMPLATE.format(test_body=test_body),
-        expected_output="TEST_PASS"
-    )
-
-    # Test 7: Execute unknown command
-    test_body = """
-    char line[] = "unknowncommand";
-    char** tokens = parse_line(line);
-    
-    int result = shell_execute(tokens);
     
-    if (result == 1) {
-        serial_write_string(SERIAL_COM1_BASE, "Unknown command handled correctly\\n");
-        serial_write_string(SERIAL_COM1_BASE, "TEST_PASS\\n");
+    if (pass) {
+        serial_write_string(SERIAL_COM1_BASE, "All commands executed correctly\\n");
+        serial_write_string(SERIAL_COM1_BASE, TEST_PASS_MSG);
     }
     else {
-        serial_write_string(SERIAL_COM1_BASE, "TEST_FAIL\\n");
+        serial_write_string(SERIAL_COM1_BASE, TEST_FAIL_MSG);
     }
     """
 
-    framework.register_test(
-        name="shell_execute_unknown",
-        test_code=SHELL_TEST_TEMPLATE.format(test_body=test_body),
-        expected_output="TEST_PASS"
-    )
-
-    # Test 8: Execute empty command
-    test_body = """
-    char line[] = "";
-    char** tokens = parse_line(line);
-    
-    int result = shell_execute(tokens);
-    
-    if (result == 1) {
-        serial_write_string(SERIAL_COM1_BASE, "Empty command handled correctly\\n");
-        serial_write_string(SERIAL_COM1_BASE, "TEST_PASS\\n");
-    }
-    else {
-        serial_write_string(SERIAL_COM1_BASE, "TEST_FAIL\\n");
-    }
-    """
+    specs.append(("shell_execute", SHELL_TEST_TEMPLATE, test_body, TEST_PASS))
 
-    framework.register_test(
-        name="shell_execute_empty",
-        test_code=SHELL_TEST_TEMPLATE.format(test_body=test_body),
-        expected_output="TEST_PASS"
-    )
+    framework.register_tests(specs)